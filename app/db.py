@@ -9,7 +9,8 @@ Base = declarative_base()
 
 # Database configuration
 import os
-DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///parody.db")
+DEFAULT_DATABASE_URL = "sqlite:///parody.db"
+DATABASE_URL = os.getenv("DATABASE_URL", DEFAULT_DATABASE_URL)
 engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
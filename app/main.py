@@ -6,7 +6,7 @@ import schedule
 import time
 import threading
 from datetime import datetime
-from typing import Dict, List
+from typing import Callable, Dict, List, Optional
 
 from app.news_fetcher import fetch_headlines
 from app.filters import is_tragedy
@@ -21,26 +21,46 @@ polling_active = False
 polling_task = None
 
 
+def run_poll(fetch: Optional[Callable[[], List[Dict[str, str]]]] = None) -> Dict:
+    """
+    Run one poll: fetch headlines, save new tragedies and send notifications.
+    
+    Args:
+        fetch: Headline source returning dicts with 'title' and 'url' keys
+               (default fetch_headlines)
+               
+    Returns:
+        Dict with the number of 'headlines' fetched, the number of 'tragedies'
+        detected and the list of newly 'saved' headlines
+    """
+    headlines = (fetch or fetch_headlines)()
+    
+    tragedies = 0
+    saved = []
+    for headline in headlines:
+        if is_tragedy(headline['title']):
+            tragedies += 1
+            article = save_article(headline['title'], headline['url'])
+            if article:
+                saved.append(headline)
+                # Send push notification for new tragedy
+                send_notification(headline['title'], headline['url'])
+    
+    return {'headlines': len(headlines), 'tragedies': tragedies, 'saved': saved}
+
+
 async def poll_headlines():
     """Background task to poll headlines and filter for tragedies"""
     global polling_active
     
     while polling_active:
         try:
-            # Fetch headlines
-            headlines = fetch_headlines()
-            
-            # Filter for tragedies and save to database
-            new_articles = 0
-            for headline in headlines:
-                if is_tragedy(headline['title']):
-                    article = save_article(headline['title'], headline['url'])
-                    if article:
-                        new_articles += 1
-                        print(f"Saved tragedy article: {headline['title'][:50]}...")
-                        # Send push notification for new tragedy
-                        send_notification(headline['title'], headline['url'])
+            # Fetch headlines, save tragedies and notify
+            saved = run_poll()['saved']
+            for headline in saved:
+                print(f"Saved tragedy article: {headline['title'][:50]}...")
             
+            new_articles = len(saved)
             if new_articles > 0:
                 print(f"Saved {new_articles} new tragedy articles to database")
             
@@ -122,16 +142,7 @@ async def trigger_poll(background_tasks: BackgroundTasks) -> Dict:
     
     async def poll_once():
         try:
-            headlines = fetch_headlines()
-            new_articles = 0
-            
-            for headline in headlines:
-                if is_tragedy(headline['title']):
-                    article = save_article(headline['title'], headline['url'])
-                    if article:
-                        new_articles += 1
-                        # Send push notification for new tragedy
-                        send_notification(headline['title'], headline['url'])
+            new_articles = len(run_poll()['saved'])
             
             print(f"Manual poll: saved {new_articles} new articles")
             return new_articles
@@ -153,23 +164,14 @@ def poll_news():
     print(f"\n[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] Starting scheduled news poll...")
     
     try:
-        # Fetch headlines
-        headlines = fetch_headlines()
-        print(f"Fetched {len(headlines)} headlines")
-        
-        # Filter for tragedies and save to database
-        new_articles = 0
-        detected_tragedies = []
+        # Fetch headlines, save tragedies and notify
+        result = run_poll()
+        print(f"Fetched {result['headlines']} headlines")
         
-        for headline in headlines:
-            if is_tragedy(headline['title']):
-                article = save_article(headline['title'], headline['url'])
-                if article:
-                    new_articles += 1
-                    detected_tragedies.append(headline['title'])
-                    print(f"  ✓ Detected tragedy: {headline['title'][:80]}...")
-                    # Send push notification for new tragedy
-                    send_notification(headline['title'], headline['url'])
+        detected_tragedies = [headline['title'] for headline in result['saved']]
+        for title in detected_tragedies:
+            print(f"  ✓ Detected tragedy: {title[:80]}...")
+        new_articles = len(detected_tragedies)
         
         # Log summary
         if new_articles > 0:
@@ -4,21 +4,33 @@ import feedparser
 from typing import List, Dict, Optional
 
 
-def fetch_from_newsapi() -> Optional[List[Dict[str, str]]]:
+# Default feed endpoints
+NEWSAPI_URL = 'https://newsapi.org/v2/top-headlines'
+RSS_FEEDS = [
+    'http://feeds.bbci.co.uk/news/rss.xml',
+    'http://rss.cnn.com/rss/cnn_topstories.rss'
+]
+
+
+def fetch_from_newsapi(url: str = NEWSAPI_URL, api_key: Optional[str] = None) -> Optional[List[Dict[str, str]]]:
     """
     Fetch headlines from NewsAPI using the API key from environment.
     
+    Args:
+        url: NewsAPI top-headlines endpoint (default NEWSAPI_URL)
+        api_key: NewsAPI key (default NEWSAPI_KEY from environment)
+        
     Returns:
         List of dicts with 'title' and 'url' keys, or None if request fails.
     """
-    api_key = os.getenv('NEWSAPI_KEY')
+    if api_key is None:
+        api_key = os.getenv('NEWSAPI_KEY')
     
     if not api_key:
         print("Warning: NEWSAPI_KEY not found in environment variables")
         return None
     
     try:
-        url = "https://newsapi.org/v2/top-headlines"
         params = {
             'apiKey': api_key,
             'country': 'us',
@@ -54,17 +66,18 @@ def fetch_from_newsapi() -> Optional[List[Dict[str, str]]]:
         return None
 
 
-def fetch_from_rss() -> List[Dict[str, str]]:
+def fetch_from_rss(rss_feeds: Optional[List[str]] = None) -> List[Dict[str, str]]:
     """
     Fetch headlines from BBC and CNN RSS feeds.
     
+    Args:
+        rss_feeds: Feed URLs to fetch (default RSS_FEEDS)
+        
     Returns:
         List of dicts with 'title' and 'url' keys.
     """
-    rss_feeds = [
-        'http://feeds.bbci.co.uk/news/rss.xml',
-        'http://rss.cnn.com/rss/cnn_topstories.rss'
-    ]
+    if rss_feeds is None:
+        rss_feeds = RSS_FEEDS
     
     headlines = []
     
@@ -90,26 +103,34 @@ def fetch_from_rss() -> List[Dict[str, str]]:
     return headlines
 
 
-def fetch_headlines() -> List[Dict[str, str]]:
+def fetch_headlines(newsapi_url: Optional[str] = NEWSAPI_URL,
+                    rss_feeds: Optional[List[str]] = None,
+                    api_key: Optional[str] = None) -> List[Dict[str, str]]:
     """
     Fetch headlines from NewsAPI with RSS fallback.
     
     First attempts to fetch from NewsAPI. If that fails,
     falls back to fetching from RSS feeds.
     
+    Args:
+        newsapi_url: NewsAPI endpoint, or None to go straight to RSS (default NEWSAPI_URL)
+        rss_feeds: Fallback RSS feed URLs (default RSS_FEEDS)
+        api_key: NewsAPI key (default NEWSAPI_KEY from environment)
+        
     Returns:
         List of dicts with 'title' and 'url' keys.
     """
     # Try NewsAPI first
-    headlines = fetch_from_newsapi()
+    headlines = fetch_from_newsapi(newsapi_url, api_key) if newsapi_url else None
     
     if headlines:
         print(f"Fetched {len(headlines)} headlines from NewsAPI")
         return headlines
     
     # Fallback to RSS feeds
-    print("NewsAPI failed, falling back to RSS feeds")
-    headlines = fetch_from_rss()
+    if newsapi_url:
+        print("NewsAPI failed, falling back to RSS feeds")
+    headlines = fetch_from_rss(rss_feeds)
     print(f"Fetched {len(headlines)} headlines from RSS feeds")
     
     return headlines
\ No newline at end of file
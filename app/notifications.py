@@ -1,5 +1,5 @@
 import os
-from typing import Optional
+from typing import Callable, Optional
 import firebase_admin
 from firebase_admin import credentials, messaging
 
@@ -7,6 +7,9 @@ from firebase_admin import credentials, messaging
 # Global variable to track initialization
 firebase_initialized = False
 
+# Optional replacement for messaging.send (used by the offline replay harness)
+transport: Optional[Callable[[messaging.Message], str]] = None
+
 
 def init_firebase() -> bool:
     """
@@ -52,7 +55,7 @@ def send_notification(title: str, url: str) -> Optional[str]:
         Message ID if successful, None if failed
     """
     # Ensure Firebase is initialized
-    if not firebase_initialized:
+    if transport is None and not firebase_initialized:
         if not init_firebase():
             print("Cannot send notification: Firebase not initialized")
             return None
@@ -73,7 +76,8 @@ def send_notification(title: str, url: str) -> Optional[str]:
         )
         
         # Send the message
-        response = messaging.send(message)
+        send = transport if transport is not None else messaging.send
+        response = send(message)
         print(f"Successfully sent notification: {response}")
         return response
         
@@ -82,6 +86,18 @@ def send_notification(title: str, url: str) -> Optional[str]:
         return None
 
 
+def set_transport(send: Optional[Callable[[messaging.Message], str]]) -> None:
+    """
+    Replace the FCM transport used by send_notification.
+    
+    Args:
+        send: Callable taking a messaging.Message and returning a message ID,
+              or None to restore the real Firebase transport
+    """
+    global transport
+    transport = send
+
+
 def send_test_notification() -> Optional[str]:
     """
     Send a test notification to verify Firebase setup.
@@ -0,0 +1,413 @@
+"""
+Feed capture and offline replay harness.
+
+Capture mode records the raw bytes of real NewsAPI and RSS responses to a
+gzipped JSON-lines corpus. Replay mode serves that corpus from a local stub
+HTTP server and runs it through app.main.run_poll (fetch_headlines ->
+is_tragedy -> save_article -> send_notification) against a fake FCM
+transport, reporting throughput, ingest-to-notify latency and peak memory.
+
+Usage:
+    python -m app.replay capture --corpus corpus.jsonl.gz
+    python -m app.replay replay --corpus corpus.jsonl.gz --feeds 1000 --speed 10
+"""
+import argparse
+import base64
+import contextlib
+import gzip
+import io
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+
+# Seconds between polls in app.main; replay speed is a multiple of this rate
+POLL_INTERVAL = 300
+
+# NewsAPI key sent to the stub server, which ignores it
+REPLAY_API_KEY = 'replay'
+
+# Line prefixes the fetcher, db and notification modules use to report failures
+ERROR_PREFIXES = ('Error ', 'Unexpected error ', 'Warning: Error ', 'NewsAPI returned status')
+
+
+def write_corpus(path: str, entries: List[Dict[str, str]], append: bool = False) -> int:
+    """
+    Write feed responses to a gzipped JSON-lines corpus.
+
+    Args:
+        path: Corpus file path
+        entries: Dicts with 'kind', 'source', 'content_type' and 'body' keys,
+                 where 'body' is the base64-encoded response bytes
+        append: Add to an existing corpus instead of overwriting it
+
+    Returns:
+        Number of entries written
+    """
+    with gzip.open(path, 'at' if append else 'wt', encoding='utf-8') as f:
+        for entry in entries:
+            f.write(json.dumps(entry, separators=(',', ':')) + '\n')
+    return len(entries)
+
+
+def read_corpus(path: str) -> List[Dict[str, str]]:
+    """
+    Read feed responses from a gzipped JSON-lines corpus.
+
+    Args:
+        path: Corpus file path
+
+    Returns:
+        List of corpus entries in capture order
+    """
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def capture_feeds(path: str, append: bool = False) -> int:
+    """
+    Fetch the live NewsAPI and RSS feeds and record their raw responses.
+
+    Response bodies are stored byte for byte so replays see exactly what the
+    feed served, whatever its declared encoding. NewsAPI is skipped when
+    NEWSAPI_KEY is not set. The API key is never written to the corpus.
+
+    Args:
+        path: Corpus file path
+        append: Add to an existing corpus instead of overwriting it
+
+    Returns:
+        Number of feed responses captured
+    """
+    import requests
+    from app.news_fetcher import NEWSAPI_URL, RSS_FEEDS
+
+    sources = []
+    api_key = os.getenv('NEWSAPI_KEY')
+    if api_key:
+        sources.append(('newsapi', NEWSAPI_URL, {'apiKey': api_key, 'country': 'us', 'pageSize': 20}))
+    else:
+        print("Warning: NEWSAPI_KEY not found, capturing RSS feeds only")
+    sources.extend(('rss', feed_url, None) for feed_url in RSS_FEEDS)
+
+    entries = []
+    for kind, source, params in sources:
+        try:
+            response = requests.get(source, params=params, timeout=10)
+            response.raise_for_status()
+            entries.append({
+                'kind': kind,
+                'source': source,
+                'content_type': response.headers.get('Content-Type', 'application/octet-stream'),
+                'body': base64.b64encode(response.content).decode('ascii')
+            })
+        except requests.RequestException as e:
+            print(f"Error capturing {source}: {e}")
+
+    return write_corpus(path, entries, append=append)
+
+
+class _FeedHandler(BaseHTTPRequestHandler):
+    """Serve corpus entry N (modulo corpus size) at /feeds/N"""
+
+    def do_GET(self):
+        path = self.path.split('?', 1)[0]
+        try:
+            index = int(path.rsplit('/', 1)[-1])
+        except ValueError:
+            self.send_error(404)
+            return
+
+        content_type, body = self.server.responses[index % len(self.server.responses)]
+
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub_server(corpus: List[Dict[str, str]]) -> ThreadingHTTPServer:
+    """
+    Start a local HTTP server serving the corpus on a free port.
+
+    Args:
+        corpus: Entries returned by read_corpus
+
+    Returns:
+        The running server; call shutdown() when done
+    """
+    if not corpus:
+        raise ValueError("Cannot serve an empty corpus")
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _FeedHandler)
+    server.daemon_threads = True
+    server.responses = [(entry['content_type'], base64.b64decode(entry['body'])) for entry in corpus]
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+class FakeTransport:
+    """Stand-in for messaging.send that records send times instead of calling FCM"""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.sent_at = []
+
+    def __call__(self, message) -> str:
+        if self.latency:
+            time.sleep(self.latency)
+        self.sent_at.append(time.perf_counter())
+        return f"replay-{len(self.sent_at)}"
+
+
+class _ErrorCountingLog(io.TextIOBase):
+    """Text stream that forwards pipeline output and counts lines starting with ERROR_PREFIXES"""
+
+    def __init__(self, target):
+        self.target = target
+        self.error_count = 0
+        self._line = ''
+
+    def write(self, text: str) -> int:
+        *lines, self._line = (self._line + text).split('\n')
+        self.error_count += sum(1 for line in lines if line.startswith(ERROR_PREFIXES))
+        return self.target.write(text)
+
+    def flush(self):
+        self.target.flush()
+
+
+def _percentile(values: List[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile of values, or None if empty"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return ordered[int(rank) - 1]
+
+
+def _peak_memory_mb() -> Optional[float]:
+    """Peak resident set size of this process in MB, or None if unavailable"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS, kilobytes elsewhere
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def _is_default_database(database_url: str) -> bool:
+    """Whether database_url resolves to the same SQLite file as the default parody.db"""
+    from sqlalchemy.engine import make_url
+    from app.db import DEFAULT_DATABASE_URL
+
+    url = make_url(database_url)
+    if url.get_backend_name() != 'sqlite' or not url.database or url.database == ':memory:':
+        return False
+    default_path = make_url(DEFAULT_DATABASE_URL).database
+    return os.path.normcase(os.path.abspath(url.database)) == os.path.normcase(os.path.abspath(default_path))
+
+
+def replay_corpus(corpus: List[Dict[str, str]], feeds: int = 1000, speed: float = 0.0,
+                  rounds: int = 1, fcm_latency: float = 0.0, log=None) -> Dict:
+    """
+    Replay a corpus through app.main.run_poll and measure it.
+
+    Each of `feeds` stub feeds serves a corpus entry in turn and is polled once
+    per round via fetch_headlines. Article URLs are tagged with the feed and
+    round number so every poll saves and notifies its tragedies afresh.
+
+    The database is whatever DATABASE_URL pointed at when app.db was first
+    imported; replaying into the default parody.db is refused.
+
+    Args:
+        corpus: Entries returned by read_corpus
+        feeds: Number of stub feeds to poll per round
+        speed: Poll rate as a multiple of the real 5 minute interval
+               (0 polls rounds back-to-back)
+        rounds: Number of poll rounds
+        fcm_latency: Simulated FCM send latency in seconds
+        log: Text stream for pipeline output (default stdout)
+
+    Returns:
+        Dict of replay statistics
+    """
+    from app import db, notifications
+    from app.main import run_poll
+    from app.news_fetcher import fetch_headlines
+
+    if _is_default_database(db.DATABASE_URL):
+        raise RuntimeError("Refusing to replay into the default parody.db; "
+                           "point DATABASE_URL at another database before app.db is imported")
+    db.init_db()
+
+    transport = FakeTransport(latency=fcm_latency)
+    pipeline_log = _ErrorCountingLog(log if log is not None else sys.stdout)
+    interval = POLL_INTERVAL / speed if speed > 0 else None
+
+    notifications.set_transport(transport)
+    server = start_stub_server(corpus)
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    headlines_seen = 0
+    tragedies = 0
+    saved = 0
+    empty_polls = 0
+    overrun_rounds = 0
+    latencies = []
+    busy = 0.0
+
+    try:
+        with contextlib.redirect_stdout(pipeline_log):
+            for round_number in range(rounds):
+                round_start = time.perf_counter()
+
+                for i in range(feeds):
+                    feed_url = f"{base_url}/feeds/{i}"
+                    if corpus[i % len(corpus)]['kind'] == 'newsapi':
+                        fetch_kwargs = {'newsapi_url': feed_url, 'rss_feeds': [], 'api_key': REPLAY_API_KEY}
+                    else:
+                        fetch_kwargs = {'newsapi_url': None, 'rss_feeds': [feed_url]}
+                    tag = f"#feed-{i}-round-{round_number}"
+                    poll = {}
+
+                    def fetch() -> List[Dict[str, str]]:
+                        headlines = fetch_headlines(**fetch_kwargs)
+                        poll['ingested_at'] = time.perf_counter()
+                        return [{'title': h['title'], 'url': h['url'] + tag} for h in headlines]
+
+                    sent_before = len(transport.sent_at)
+                    result = run_poll(fetch)
+
+                    headlines_seen += result['headlines']
+                    tragedies += result['tragedies']
+                    saved += len(result['saved'])
+                    if not result['headlines']:
+                        empty_polls += 1
+                    latencies.extend(sent_at - poll['ingested_at'] for sent_at in transport.sent_at[sent_before:])
+
+                elapsed = time.perf_counter() - round_start
+                busy += elapsed
+                if interval is not None and elapsed > interval:
+                    overrun_rounds += 1
+
+                # Wait out the rest of the (sped up) poll interval, except after the last round
+                if interval is not None and round_number < rounds - 1:
+                    time.sleep(max(0.0, interval - elapsed))
+    finally:
+        server.shutdown()
+        server.server_close()
+        notifications.set_transport(None)
+
+    p50 = _percentile(latencies, 50)
+    p99 = _percentile(latencies, 99)
+
+    return {
+        'feeds': feeds,
+        'rounds': rounds,
+        'headlines': headlines_seen,
+        'tragedies': tragedies,
+        'duplicates': tragedies - saved,
+        'notifications': len(transport.sent_at),
+        'empty_polls': empty_polls,
+        'errors': pipeline_log.error_count,
+        'busy_seconds': busy,
+        'headlines_per_second': headlines_seen / busy if busy else 0.0,
+        'target_interval_seconds': interval,
+        'mean_round_seconds': busy / rounds if rounds else 0.0,
+        'overrun_rounds': overrun_rounds,
+        'latencies': latencies,
+        'p50_latency_ms': p50 * 1000 if p50 is not None else None,
+        'p99_latency_ms': p99 * 1000 if p99 is not None else None,
+        'peak_memory_mb': _peak_memory_mb()
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command-line entry point for capture and replay"""
+    parser = argparse.ArgumentParser(prog='python -m app.replay', description=__doc__.strip().splitlines()[0])
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    capture_parser = subparsers.add_parser('capture', help='Record live feed responses to a corpus')
+    capture_parser.add_argument('--corpus', default='corpus.jsonl.gz', help='Corpus file path')
+    capture_parser.add_argument('--append', action='store_true', help='Append to an existing corpus')
+
+    replay_parser = subparsers.add_parser('replay', help='Replay a corpus through the poll path offline')
+    replay_parser.add_argument('--corpus', default='corpus.jsonl.gz', help='Corpus file path')
+    replay_parser.add_argument('--feeds', type=int, default=1000, help='Stub feeds polled per round')
+    replay_parser.add_argument('--speed', type=float, default=0.0,
+                               help='Poll rate as a multiple of the 5 minute interval (0 = back-to-back)')
+    replay_parser.add_argument('--rounds', type=int, default=1, help='Number of poll rounds')
+    replay_parser.add_argument('--fcm-latency', type=float, default=0.0,
+                               help='Simulated FCM send latency in milliseconds')
+    replay_parser.add_argument('--database-url', help='Database URL (default: throwaway SQLite file)')
+    replay_parser.add_argument('--log', default='replay.log', help='File for pipeline output')
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'capture':
+        count = capture_feeds(args.corpus, append=args.append)
+        print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] Captured {count} feed responses to {args.corpus}")
+        return 0 if count else 1
+
+    corpus = read_corpus(args.corpus)
+    if not corpus:
+        print(f"Corpus {args.corpus} is empty")
+        return 1
+
+    # Ignore cleanup errors so a still-open SQLite file (e.g. on Windows) can't lose the report
+    with tempfile.TemporaryDirectory(ignore_cleanup_errors=True) as tmp_dir:
+        # Must be set before app.db is imported so the engine picks it up
+        os.environ['DATABASE_URL'] = args.database_url or f"sqlite:///{os.path.join(tmp_dir, 'replay.db')}"
+
+        print(f"Replaying {len(corpus)} captured responses as {args.feeds} feeds x {args.rounds} rounds...")
+        try:
+            with open(args.log, 'w', encoding='utf-8') as log:
+                stats = replay_corpus(corpus, feeds=args.feeds, speed=args.speed, rounds=args.rounds,
+                                      fcm_latency=args.fcm_latency / 1000, log=log)
+        finally:
+            # Release pooled connections before the temporary database is removed
+            from app import db
+            db.engine.dispose()
+
+    def ms(value: Optional[float]) -> str:
+        return f"{value:.2f} ms" if value is not None else "n/a"
+
+    polls = stats['feeds'] * stats['rounds']
+    print(f"Headlines processed: {stats['headlines']} ({stats['tragedies']} tragedies, "
+          f"{stats['duplicates']} duplicates, {stats['notifications']} notifications)")
+    print(f"Polls with no headlines: {stats['empty_polls']} of {polls}; "
+          f"errors logged: {stats['errors']} (see {args.log})")
+    print(f"Throughput: {stats['headlines_per_second']:.1f} headlines/s over {stats['busy_seconds']:.2f}s")
+    print(f"Ingest-to-notify latency: p50 {ms(stats['p50_latency_ms'])}, p99 {ms(stats['p99_latency_ms'])}")
+    if stats['target_interval_seconds'] is not None:
+        print(f"Poll interval: target {stats['target_interval_seconds']:.2f}s, "
+              f"achieved {stats['mean_round_seconds']:.2f}s per round")
+        if stats['overrun_rounds']:
+            print(f"Warning: {stats['overrun_rounds']} of {stats['rounds']} rounds overran the target interval; "
+                  f"replay ran below the requested {args.speed:g}x rate")
+    peak = stats['peak_memory_mb']
+    print(f"Peak memory: {f'{peak:.1f} MB' if peak is not None else 'n/a'}")
+
+    if not stats['headlines']:
+        print("Error: no headlines were processed")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
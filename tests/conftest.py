@@ -0,0 +1,30 @@
+import os
+import shutil
+import sys
+import tempfile
+
+_database_dir = None
+_previous_database_url = None
+
+
+def pytest_configure(config):
+    """Point DATABASE_URL at a throwaway SQLite file before any test imports app.db"""
+    global _database_dir, _previous_database_url
+
+    _database_dir = tempfile.mkdtemp(prefix='parody-tests-')
+    _previous_database_url = os.environ.get('DATABASE_URL')
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(_database_dir, 'test.db')}"
+
+
+def pytest_unconfigure(config):
+    """Close database connections, remove the test database and restore DATABASE_URL"""
+    if 'app.db' in sys.modules:
+        sys.modules['app.db'].engine.dispose()
+
+    if _previous_database_url is None:
+        os.environ.pop('DATABASE_URL', None)
+    else:
+        os.environ['DATABASE_URL'] = _previous_database_url
+
+    if _database_dir:
+        shutil.rmtree(_database_dir, ignore_errors=True)
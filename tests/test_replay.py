@@ -0,0 +1,230 @@
+import base64
+import io
+import json
+import os
+import urllib.request
+import uuid
+
+import pytest
+from app import db, news_fetcher, notifications
+from app.replay import (FakeTransport, _ErrorCountingLog, _percentile, capture_feeds, main, read_corpus,
+                        replay_corpus, start_stub_server, write_corpus)
+
+
+def make_entry(kind, body, content_type):
+    return {
+        'kind': kind,
+        'source': f"http://example.com/{kind}",
+        'content_type': content_type,
+        'body': base64.b64encode(body).decode('ascii')
+    }
+
+
+def rss_body(items):
+    entries = ''.join(f"<item><title>{title}</title><link>{url}</link></item>" for title, url in items)
+    return (f'<?xml version="1.0" encoding="utf-8"?><rss version="2.0"><channel><title>Test</title>'
+            f'{entries}</channel></rss>').encode('utf-8')
+
+
+def newsapi_body(items):
+    articles = [{'title': title, 'url': url} for title, url in items]
+    return json.dumps({'status': 'ok', 'articles': articles}).encode('utf-8')
+
+
+def unique_items(*titles):
+    prefix = uuid.uuid4().hex
+    return [(title, f"http://example.com/{prefix}/{n}") for n, title in enumerate(titles)]
+
+
+@pytest.fixture
+def stub_server():
+    servers = []
+
+    def start(corpus):
+        server = start_stub_server(corpus)
+        servers.append(server)
+        return f"http://127.0.0.1:{server.server_address[1]}"
+
+    yield start
+
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+CORPUS = [
+    make_entry('rss', b'<rss>a</rss>', 'application/rss+xml'),
+    make_entry('newsapi', b'{"status": "ok"}', 'application/json'),
+]
+
+
+class TestCorpus:
+
+    def test_round_trip(self, tmp_path):
+        path = str(tmp_path / 'corpus.jsonl.gz')
+        assert write_corpus(path, CORPUS) == 2
+        assert read_corpus(path) == CORPUS
+
+    def test_append(self, tmp_path):
+        path = str(tmp_path / 'corpus.jsonl.gz')
+        write_corpus(path, CORPUS[:1])
+        write_corpus(path, CORPUS[1:], append=True)
+        assert read_corpus(path) == CORPUS
+
+
+class TestStubServer:
+
+    def test_serves_entries_modulo_corpus_size(self, stub_server):
+        base_url = stub_server(CORPUS)
+        with urllib.request.urlopen(f"{base_url}/feeds/0") as response:
+            assert response.read() == b'<rss>a</rss>'
+            assert response.headers['Content-Type'] == 'application/rss+xml'
+        with urllib.request.urlopen(f"{base_url}/feeds/3") as response:
+            assert response.read() == b'{"status": "ok"}'
+
+    def test_rejects_empty_corpus(self):
+        with pytest.raises(ValueError):
+            start_stub_server([])
+
+
+class TestFetcherEndpoints:
+
+    def test_fetch_from_newsapi_url_and_key(self, stub_server, monkeypatch):
+        monkeypatch.delenv('NEWSAPI_KEY', raising=False)
+        items = unique_items('Deadly storm hits coast')
+        base_url = stub_server([make_entry('newsapi', newsapi_body(items), 'application/json')])
+
+        headlines = news_fetcher.fetch_from_newsapi(f"{base_url}/feeds/0", api_key='test')
+        assert headlines == [{'title': title, 'url': url} for title, url in items]
+
+    def test_fetch_from_rss_feeds(self, stub_server):
+        items = unique_items('Plane crash in mountains', 'Local team wins')
+        base_url = stub_server([make_entry('rss', rss_body(items), 'application/rss+xml')])
+
+        headlines = news_fetcher.fetch_from_rss([f"{base_url}/feeds/0"])
+        assert headlines == [{'title': title, 'url': url} for title, url in items]
+
+    def test_fetch_headlines_without_newsapi(self, stub_server, capsys):
+        items = unique_items('Flood warnings issued')
+        base_url = stub_server([make_entry('rss', rss_body(items), 'application/rss+xml')])
+
+        headlines = news_fetcher.fetch_headlines(newsapi_url=None, rss_feeds=[f"{base_url}/feeds/0"])
+        assert headlines == [{'title': title, 'url': url} for title, url in items]
+        assert 'NewsAPI failed' not in capsys.readouterr().out
+
+
+class TestTransport:
+
+    def test_set_transport_routes_and_restores(self, monkeypatch):
+        def real_send(message):
+            raise AssertionError("messaging.send should not be called")
+
+        monkeypatch.setattr(notifications.messaging, 'send', real_send)
+        transport = FakeTransport()
+
+        notifications.set_transport(transport)
+        try:
+            assert notifications.send_notification("Deadly storm", "http://example.com/a") == 'replay-1'
+            assert len(transport.sent_at) == 1
+        finally:
+            notifications.set_transport(None)
+
+        assert notifications.transport is None
+
+
+class TestReplay:
+
+    def test_replay_counts_every_round(self):
+        corpus = [
+            make_entry('newsapi', newsapi_body(unique_items('Deadly storm hits coast', 'Stock market rises')),
+                       'application/json'),
+            make_entry('rss', rss_body(unique_items('Earthquake strikes', 'Gas explosion downtown', 'New cafe')),
+                       'application/rss+xml'),
+        ]
+
+        stats = replay_corpus(corpus, feeds=4, rounds=2, log=io.StringIO())
+
+        # 4 feeds alternate newsapi (2 headlines, 1 tragedy) and rss (3 headlines, 2 tragedies)
+        assert stats['headlines'] == 2 * (2 + 3 + 2 + 3)
+        assert stats['tragedies'] == 2 * (1 + 2 + 1 + 2)
+        assert stats['duplicates'] == 0
+        assert stats['notifications'] == stats['tragedies']
+        assert stats['empty_polls'] == 0
+        assert stats['errors'] == 0
+        assert len(stats['latencies']) == stats['notifications']
+        assert all(latency >= 0 for latency in stats['latencies'])
+        assert notifications.transport is None
+
+    def test_replay_reports_unparseable_feeds(self, tmp_path):
+        path = str(tmp_path / 'corpus.jsonl.gz')
+        write_corpus(path, [make_entry('rss', b'not a feed', 'text/html')])
+
+        stats = replay_corpus(read_corpus(path), feeds=2, log=io.StringIO())
+        assert stats['headlines'] == 0
+        assert stats['empty_polls'] == 2
+        assert stats['errors'] >= 2
+
+        assert main(['replay', '--corpus', path, '--feeds', '2', '--log', str(tmp_path / 'replay.log')]) == 1
+
+    @pytest.mark.parametrize('database_url', [
+        db.DEFAULT_DATABASE_URL,
+        'sqlite:///./parody.db',
+        f"sqlite:///{os.path.abspath('parody.db')}",
+    ])
+    def test_replay_refuses_default_database(self, monkeypatch, database_url):
+        monkeypatch.setattr(db, 'DATABASE_URL', database_url)
+        with pytest.raises(RuntimeError):
+            replay_corpus(CORPUS, feeds=1)
+
+    def test_error_log_counts_failure_lines_only(self):
+        log = _ErrorCountingLog(io.StringIO())
+        print("Saved tragedy article: Terror attack leaves error-prone grid down", file=log)
+        print("Error-prone bridge collapses", file=log)
+        print("Error fetching RSS feed http://example.com: timed out", file=log)
+        print("Warning: Error parsing feed http://example.com: not xml", file=log)
+        assert log.error_count == 2
+
+
+class TestCaptureReplay:
+
+    def test_capture_keeps_original_bytes(self, stub_server, tmp_path, monkeypatch):
+        # UTF-8 served as bare text/xml, which requests would decode as ISO-8859-1
+        body = rss_body(unique_items('Deadly flood in São Paulo'))
+        base_url = stub_server([make_entry('rss', body, 'text/xml')])
+        monkeypatch.setattr(news_fetcher, 'RSS_FEEDS', [f"{base_url}/feeds/0"])
+        monkeypatch.delenv('NEWSAPI_KEY', raising=False)
+
+        path = str(tmp_path / 'corpus.jsonl.gz')
+        assert capture_feeds(path) == 1
+        assert base64.b64decode(read_corpus(path)[0]['body']) == body
+
+    def test_capture_then_replay_non_ascii(self, stub_server, tmp_path, monkeypatch):
+        items = unique_items('Deadly flood in São Paulo', 'Zürich tram crash')
+        base_url = stub_server([make_entry('rss', rss_body(items), 'application/rss+xml')])
+        monkeypatch.setattr(news_fetcher, 'RSS_FEEDS', [f"{base_url}/feeds/0"])
+        monkeypatch.delenv('NEWSAPI_KEY', raising=False)
+
+        path = str(tmp_path / 'corpus.jsonl.gz')
+        capture_feeds(path)
+        stats = replay_corpus(read_corpus(path), feeds=1, log=io.StringIO())
+
+        assert stats['headlines'] == 2
+        assert stats['notifications'] == 2
+        titles = {article.title for article in db.get_recent_articles(100)}
+        assert {'Deadly flood in São Paulo', 'Zürich tram crash'} <= titles
+
+
+class TestStats:
+
+    def test_percentile(self):
+        values = [float(v) for v in range(1, 101)]
+        assert _percentile(values, 50) == 50.0
+        assert _percentile(values, 99) == 99.0
+        assert _percentile([3.0], 99) == 3.0
+        assert _percentile([], 50) is None
+
+    def test_fake_transport_records_sends(self):
+        transport = FakeTransport()
+        assert transport('message') == 'replay-1'
+        assert transport('message') == 'replay-2'
+        assert len(transport.sent_at) == 2